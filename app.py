@@ -5,9 +5,24 @@ This program uses OpenAI's API to recommend champion counter-picks
 based on enemy team composition.
 """
 
-from pydantic import BaseModel, Field
-from typing import List
-from helpers import structured_generator
+import os
+import sys
+import json
+import argparse
+import threading
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, model_validator
+from typing import Callable, List, Optional
+from helpers import (
+    PoorAnswerError,
+    cached_batch_response,
+    cached_response,
+    structured_generator_batch,
+    structured_generator_stream,
+    semantic_cache_get,
+    semantic_cache_set,
+    warm_connection,
+    warm_schema
+)
 
 # ============================================================================
 # DATA MODELS - Define the structure of AI responses
@@ -18,10 +33,11 @@ class ChampionRecommendations(BaseModel):
     This model defines what data we expect back from the AI.
     Pydantic validates that the AI returns data in this exact format.
     """
+    # No extra fields allowed - OpenAI's strict structured outputs require this
+    model_config = ConfigDict(extra="forbid")
+    
     champions: List[str] = Field(
-        description="List of 3-5 recommended champion names",
-        min_items=3,
-        max_items=5
+        description="List of 3-5 recommended champion names"
     )
     reasoning: str = Field(
         description="Detailed explanation of why these champions counter the enemy team"
@@ -29,15 +45,104 @@ class ChampionRecommendations(BaseModel):
     key_threats: List[str] = Field(
         description="Main threats from enemy team you need to watch out for"
     )
+    
+    @model_validator(mode="after")
+    def check_champion_count(self):
+        # Checked here instead of with min/max length in the schema:
+        # a simpler schema is faster for OpenAI to generate against
+        if not 3 <= len(self.champions) <= 5:
+            raise ValueError(f"Expected 3-5 champions, got {len(self.champions)}")
+        return self
+
+# Generate the JSON schema once; helpers.py sends it as-is instead of rebuilding it per call
+_CHAMPION_SCHEMA = ChampionRecommendations.model_json_schema()
+ChampionRecommendations.__cached_schema__ = _CHAMPION_SCHEMA
 
 # ============================================================================
 # USER INPUT - Collect enemy team composition
 # ============================================================================
 
-def get_user_input():
+# Roles used when the user asks for recommendations for "All" roles
+ROLES = ["Top", "Jungle", "Mid", "ADC", "Support"]
+
+# Common nicknames mapped to the canonical champion name
+CHAMPION_ALIASES = {
+    "mf": "missfortune",
+    "j4": "jarvaniv",
+    "tf": "twistedfate",
+    "asol": "aurelionsol",
+    "mundo": "drmundo",
+    "kog": "kogmaw",
+    "cait": "caitlyn",
+    "ez": "ezreal",
+    "naut": "nautilus",
+    "voli": "volibear",
+    "yi": "masteryi",
+    "ww": "warwick",
+    "lb": "leblanc",
+    "kass": "kassadin",
+    "heimer": "heimerdinger",
+}
+
+
+def _canonicalize(name: str) -> str:
+    """
+    Turns a champion name into one canonical spelling.
+
+    "Lee Sin", "lee sin" and " LeeSin " all become "leesin", so the same
+    team always produces the same cache key.
+    """
+    name = name.strip().lower().replace(" ", "").replace("'", "").replace(".", "")
+    return CHAMPION_ALIASES.get(name, name)
+
+
+# Lane names accepted by --enemy, mapped to the lanes used in the prompt
+LANE_ALIASES = {
+    "top": "top",
+    "jgl": "jungle",
+    "jungle": "jungle",
+    "mid": "mid",
+    "adc": "adc",
+    "bot": "adc",
+    "sup": "support",
+    "support": "support",
+}
+
+
+def parse_args(argv: List[str]) -> dict:
+    """
+    Reads the enemy team and role from command line arguments.
+    
+    Example:
+        python app.py --enemy top=Darius,jgl=LeeSin,mid=Ahri,adc=Jinx,sup=Thresh --role Mid
+    
+    Lanes that aren't given are "Unknown". Returns the same dictionary
+    layout as the interactive input.
+    """
+    parser = argparse.ArgumentParser(description="League of Legends counter-pick AI agent")
+    parser.add_argument(
+        "--enemy",
+        default="",
+        help="Comma-separated lane=champion pairs, e.g. top=Darius,jgl=LeeSin,sup=Thresh"
+    )
+    parser.add_argument("--role", required=True, help="Your role (Top/Jungle/Mid/ADC/Support/All)")
+    args = parser.parse_args(argv)
+    
+    display_data = {lane: "Unknown" for lane in ["top", "jungle", "mid", "adc", "support"]}
+    for pair in filter(None, args.enemy.split(",")):
+        lane, _, champion = pair.partition("=")
+        lane = lane.strip().lower()
+        if lane not in LANE_ALIASES:
+            parser.error(f"unknown lane '{lane}' in --enemy (use top, jgl, mid, adc or sup)")
+        display_data[LANE_ALIASES[lane]] = champion.strip() or "Unknown"
+    
+    display_data["your_role"] = args.role.strip().capitalize()
+    return display_data
+
+
+def ask_user_input() -> dict:
     """
-    Collects champion picks from the user.
-    Returns a dictionary with all the inputs.
+    Asks the user for the enemy team and their role, one question at a time.
     """
     print("=" * 60)
     print("    LEAGUE OF LEGENDS COUNTER-PICK AI AGENT")
@@ -53,7 +158,7 @@ def get_user_input():
     
     # Collect your role
     print("\nYour role:")
-    your_role = input("Role (Top/Jungle/Mid/ADC/Support): ").strip().capitalize()
+    your_role = input("Role (Top/Jungle/Mid/ADC/Support/All): ").strip().capitalize()
     
     return {
         "top": enemy_top,
@@ -64,31 +169,44 @@ def get_user_input():
         "your_role": your_role
     }
 
-# ============================================================================
-# PROMPT ENGINEERING - Create detailed instructions for the AI
-# ============================================================================
 
-def create_prompt(enemy_team: dict, your_role: str) -> str:
+def get_user_input(argv: Optional[List[str]] = None):
     """
-    Creates a detailed prompt that gives the AI context about League of Legends
-    and what makes a good counter-pick.
+    Collects champion picks from the command line arguments, or asks the
+    user for them if no arguments were given.
     
-    The more specific and detailed your prompt, the better the AI's recommendations.
+    Returns two dictionaries with the same keys:
+    - canonical champion names, used for caching
+    - the names as the user typed them, used in the prompt and output
     """
+    if argv is None:
+        argv = sys.argv[1:]
+    
+    if argv:
+        display_data = parse_args(argv)
+    else:
+        display_data = ask_user_input()
     
-    prompt = f"""You are an expert League of Legends analyst specializing in champion select strategy.
+    # "Unknown" is kept as-is so skipped lanes stay recognizable
+    user_data = {
+        key: value if key == "your_role" or value == "Unknown" else _canonicalize(value)
+        for key, value in display_data.items()
+    }
+    
+    return user_data, display_data
 
-ENEMY TEAM COMPOSITION:
-- Top: {enemy_team['top']}
-- Jungle: {enemy_team['jungle']}
-- Mid: {enemy_team['mid']}
-- ADC: {enemy_team['adc']}
-- Support: {enemy_team['support']}
+# ============================================================================
+# PROMPT ENGINEERING - Create detailed instructions for the AI
+# ============================================================================
 
-YOUR ROLE: {your_role}
+# The static part of the instructions is sent first (as the system prompt) and
+# never changes, so OpenAI can reuse its cached copy of this prefix between calls.
+# Only the short team/role message below changes from request to request.
+_STATIC_SYSTEM = """You are an expert League of Legends analyst specializing in champion select strategy.
 
 TASK:
-Recommend 3-5 champions for the {your_role} role that counter this enemy team composition.
+You will be given the enemy team composition and the player's role.
+Recommend 3-5 champions for that role that counter this enemy team composition.
 
 ANALYSIS CRITERIA:
 1. **Lane Matchup**: How well does the champion perform in direct lane matchups?
@@ -101,13 +219,132 @@ ANALYSIS CRITERIA:
 
 Provide champions that synergize well against THIS specific enemy composition, not just general strong picks."""
 
+
+def create_prompt(enemy_team: dict, your_role: str) -> str:
+    """
+    Creates the part of the prompt that changes between requests:
+    the enemy team and your role.
+    
+    The detailed League of Legends instructions live in _STATIC_SYSTEM.
+    """
+    
+    prompt = f"""ENEMY TEAM COMPOSITION:
+- Top: {enemy_team['top']}
+- Jungle: {enemy_team['jungle']}
+- Mid: {enemy_team['mid']}
+- ADC: {enemy_team['adc']}
+- Support: {enemy_team['support']}
+
+YOUR ROLE: {your_role}"""
+
     return prompt
 
+
+def describe_team(enemy_team: dict) -> str:
+    """
+    Short one-line summary of the enemy team, used to find similar earlier requests.
+    """
+    return ", ".join(f"{lane}: {champion}" for lane, champion in enemy_team.items())
+
+def team_partition(enemy_team: dict, your_role: str) -> str:
+    """
+    Groups requests that may share a similar-team answer: same role, same known champions.
+    
+    describe_team() strings differ by only a few characters when one champion
+    changes, so their embeddings alone can't tell such teams apart.
+    """
+    known = sorted(champion for champion in enemy_team.values() if champion != "Unknown")
+    return f"{your_role}|{','.join(known)}"
+
+def load_generic_picks(role: str) -> Optional[ChampionRecommendations]:
+    """
+    Returns general strong picks for a role from generic_picks.json.
+    
+    Used when the whole enemy team is "Unknown" - there is nothing to counter,
+    so there is no need to ask the AI. Returns None for unrecognized roles.
+    """
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "generic_picks.json")
+    with open(path, encoding="utf-8") as f:
+        picks = json.load(f)
+    
+    if role.lower() not in picks:
+        return None
+    return ChampionRecommendations(**picks[role.lower()])
+
+# ============================================================================
+# MODEL SELECTION - Start with a fast model, escalate only when needed
+# ============================================================================
+
+# Models tried in order. This is a small structured task, so the fast, cheap
+# model usually does the job; bigger (slower, more expensive) models are only
+# used when the answer is invalid or too thin.
+MODEL_TIER = ["gpt-4o-mini", "gpt-4.1", "gpt-5"]
+
+# Reasoning shorter than this is treated as a low-quality answer
+MIN_REASONING_LENGTH = 50
+
+
+def is_good_answer(result: ChampionRecommendations) -> bool:
+    return len(result.reasoning) >= MIN_REASONING_LENGTH
+
+
+def generate_with_escalation(generate: Callable, is_good: Callable = is_good_answer):
+    """
+    Calls generate(model, accept) with each model in MODEL_TIER until one gives a good answer.
+    
+    generate should pass accept on to the helpers function, which raises
+    PoorAnswerError (and doesn't cache the answer) when accept(result) is False.
+    A model's answer is also rejected if it fails Pydantic validation.
+    The last model gets accept=None, so its answer is used as long as it is valid.
+    """
+    for model in MODEL_TIER:
+        is_last = model == MODEL_TIER[-1]
+        try:
+            return generate(model, None if is_last else is_good)
+        except (ValidationError, PoorAnswerError):
+            if is_last:
+                raise
+
+# ============================================================================
+# DISPLAY - Print the AI's recommendations
+# ============================================================================
+
+def print_header(title: str):
+    print("=" * 60)
+    print(f"  {title}")
+    print("=" * 60)
+
+
+def print_champion(number: int, champion: str):
+    """Prints one recommended champion immediately (used while streaming)."""
+    print(f"{number}. {champion}", flush=True)
+
+
+def print_details(result: ChampionRecommendations):
+    """Prints the key threats and reasoning sections."""
+    print()
+    print_header("KEY THREATS TO WATCH")
+    for threat in result.key_threats:
+        print(f"⚠️  {threat}")
+    
+    print()
+    print_header("REASONING")
+    print(result.reasoning)
+    print("=" * 60)
+
+
+def print_recommendations(role: str, result: ChampionRecommendations):
+    """Prints a complete set of recommendations for one role."""
+    print_header(f"RECOMMENDED CHAMPIONS FOR {role.upper()}")
+    for i, champion in enumerate(result.champions, 1):
+        print_champion(i, champion)
+    print_details(result)
+
 # ============================================================================
 # MAIN EXECUTION
 # ============================================================================
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """
     Main function that orchestrates the entire program:
     1. Get user input
@@ -116,57 +353,154 @@ def main():
     4. Display results
     """
     
+    # Strict structured outputs guarantee the schema but are slower.
+    # ChampionRecommendations is simple enough that non-strict output is reliable.
+    strict_output = False
+    
+    # Let OpenAI compile the response schema while the user is typing
+    # (only strict mode compiles the schema, so there is nothing to warm otherwise)
+    if strict_output:
+        threading.Thread(
+            target=warm_schema,
+            args=(MODEL_TIER[0], ChampionRecommendations, strict_output),
+            daemon=True
+        ).start()
+    
     # Step 1: Collect information from user
-    user_data = get_user_input()
+    user_data, display_data = get_user_input(argv)
+    
+    # Nothing to counter if every enemy is unknown - show general picks without calling the AI
+    if all(v == "Unknown" for k, v in user_data.items() if k != "your_role"):
+        roles = ROLES if user_data["your_role"] == "All" else [user_data["your_role"]]
+        generic = [(role, load_generic_picks(role)) for role in roles]
+        if all(result is not None for _, result in generic):
+            print("\nNo enemy champions entered - showing general strong picks.\n")
+            for role, result in generic:
+                print_recommendations(role, result)
+                print()
+            return
+    
+    # Open the connection to OpenAI while the prompt is being built
+    threading.Thread(target=warm_connection, daemon=True).start()
     
     # Step 2: Build the AI prompt with detailed context
+    # The prompt uses the names as typed. The cache key is the same prompt
+    # written with canonical names, so every spelling of a team gives the same
+    # key, while a change to the prompt wording gives a new one.
+    lanes = ["top", "jungle", "mid", "adc", "support"]
+    enemy_team = {lane: user_data[lane] for lane in lanes}
     prompt = create_prompt(
-        enemy_team={
-            "top": user_data["top"],
-            "jungle": user_data["jungle"],
-            "mid": user_data["mid"],
-            "adc": user_data["adc"],
-            "support": user_data["support"]
-        },
+        enemy_team={lane: display_data[lane] for lane in lanes},
         your_role=user_data["your_role"]
     )
+    cache_key = create_prompt(enemy_team=enemy_team, your_role=user_data["your_role"])
+    team_description = describe_team(enemy_team)
+    partition = team_partition(enemy_team, user_data["your_role"])
     
-    # Step 3: Configure the AI model
-    # Options: "gpt-4-turbo" (best), "gpt-4" (good), "gpt-3.5-turbo" (cheaper)
-    openai_model = "gpt-5"
-    
-    # Step 4: Call the AI and get structured recommendations
+    # Step 3: Call the AI and get structured recommendations
     print("\n🤖 Analyzing enemy team composition...\n")
     
     try:
-        # This calls your helper function that connects to OpenAI
-        result = structured_generator(openai_model, prompt, ChampionRecommendations)
+        if user_data["your_role"] == "All":
+            # One API request covers every role instead of one request per role
+            prompts = [
+                create_prompt(enemy_team={lane: display_data[lane] for lane in lanes}, your_role=role)
+                for role in ROLES
+            ]
+            batch_cache_key = "\n\n".join(
+                create_prompt(enemy_team=enemy_team, your_role=role) for role in ROLES
+            )
+            
+            # Reuse earlier answers for exactly this team, whichever model gave them...
+            for model in MODEL_TIER:
+                results = cached_batch_response(
+                    model, ChampionRecommendations, batch_cache_key, system_prompt=_STATIC_SYSTEM
+                )
+                if results is not None:
+                    break
+            
+            # ...otherwise ask the AI
+            if results is None:
+                results = generate_with_escalation(
+                    lambda model, accept: structured_generator_batch(
+                        model,
+                        prompts,
+                        ChampionRecommendations,
+                        system_prompt=_STATIC_SYSTEM,
+                        cache_key=batch_cache_key,
+                        strict=strict_output,
+                        accept=accept
+                    ),
+                    is_good=lambda results: all(is_good_answer(r) for r in results)
+                )
+            
+            # Step 4: Display the results in a nice format
+            for role, result in zip(ROLES, results):
+                print_recommendations(role, result)
+                print()
+            return
+        
+        # Step 4: Display the results in a nice format
+        # The header goes first so champions can be shown while they stream in
+        print_header(f"RECOMMENDED CHAMPIONS FOR {user_data['your_role'].upper()}")
         
-        # Step 5: Display the results in a nice format
-        print("=" * 60)
-        print(f"  RECOMMENDED CHAMPIONS FOR {user_data['your_role'].upper()}")
-        print("=" * 60)
+        # Reuse an earlier answer for exactly this team and role (no API call)...
+        for model in MODEL_TIER:
+            result = cached_response(
+                model, ChampionRecommendations, cache_key, system_prompt=_STATIC_SYSTEM
+            )
+            if result is not None:
+                break
         
-        for i, champion in enumerate(result.champions, 1):
-            print(f"{i}. {champion}")
+        # ...or for a near-identical team (same champions, e.g. in other lanes)
+        # asked for the same role
+        embedding = None
+        if result is None:
+            result, embedding = semantic_cache_get(
+                team_description, ChampionRecommendations, partition=partition
+            )
         
-        print("\n" + "=" * 60)
-        print("  KEY THREATS TO WATCH")
-        print("=" * 60)
-        for threat in result.key_threats:
-            print(f"⚠️  {threat}")
+        if result is None:
+            def restart_output():
+                print("\n🔄 Connection lost, starting over...\n")
+                print_header(f"RECOMMENDED CHAMPIONS FOR {user_data['your_role'].upper()}")
+            
+            def generate(model, accept):
+                if model != MODEL_TIER[0]:
+                    print(f"\n🔄 Answer was incomplete, asking {model} instead...\n")
+                    print_header(f"RECOMMENDED CHAMPIONS FOR {user_data['your_role'].upper()}")
+                
+                # This calls your helper function that connects to OpenAI.
+                # Champions are printed as soon as the AI has written each one.
+                return structured_generator_stream(
+                    model,
+                    prompt,
+                    ChampionRecommendations,
+                    "champions",
+                    on_item=print_champion,
+                    system_prompt=_STATIC_SYSTEM,
+                    cache_key=cache_key,
+                    strict=strict_output,
+                    on_restart=restart_output,
+                    accept=accept
+                )
+            
+            result = generate_with_escalation(generate)
+            semantic_cache_set(embedding, result, partition=partition)
+        else:
+            for i, champion in enumerate(result.champions, 1):
+                print_champion(i, champion)
         
-        print("\n" + "=" * 60)
-        print("  REASONING")
-        print("=" * 60)
-        print(result.reasoning)
-        print("=" * 60)
+        print_details(result)
         
+    except (ValidationError, PoorAnswerError) as e:
+        print(f"\n❌ The AI's answer couldn't be used, even from {MODEL_TIER[-1]}: {e}")
+        print("Please try again.")
     except Exception as e:
         print(f"\n❌ Error: {e}")
         print("\nMake sure:")
         print("1. Your .env file exists with OPENAI_API_KEY set")
-        print("2. You have installed required packages: pip install openai pydantic python-dotenv")
+        print("2. You have installed required packages: pip install -r requirements.txt")
         print("3. You have API credits available in your OpenAI account")
 
 # ============================================================================
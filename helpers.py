@@ -6,18 +6,565 @@ and handle structured output generation using Pydantic models.
 """
 
 import os
-from openai import OpenAI
-from pydantic import BaseModel
-from typing import Type, TypeVar
+import re
+import json
+import time
+import shelve
+import asyncio
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from operator import attrgetter
+import httpx
+import openai
+from openai import OpenAI, AsyncOpenAI
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, create_model
+from typing import Callable, Iterator, List, Optional, Tuple, Type, TypeVar
 from dotenv import load_dotenv
+from tenacity import (
+    before_sleep_log,
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential_jitter
+)
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Read the API key once; it is checked when the first client is created
+_API_KEY = os.getenv("OPENAI_API_KEY")
+
+# Default system prompt used when you don't provide your own
+DEFAULT_SYSTEM_PROMPT = "You are a helpful AI assistant that provides structured, accurate responses."
+
 # TypeVar allows us to maintain type hints for any Pydantic model
 T = TypeVar('T', bound=BaseModel)
 
-def structured_generator(model: str, prompt: str, response_model: Type[T]) -> T:
+# Connection pool sizing - raise these if you run many requests in parallel
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "200"))
+OPENAI_KEEPALIVE = int(os.getenv("OPENAI_KEEPALIVE", "100"))
+
+# One HTTP client shared by every OpenAI call, so pooled connections get reused
+_HTTP_CLIENT = httpx.Client(
+    limits=httpx.Limits(
+        max_connections=OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=OPENAI_KEEPALIVE
+    ),
+    timeout=httpx.Timeout(120.0)
+)
+
+# Response cache - identical requests are answered from disk instead of the API
+# LLM_CACHE_TTL is in seconds; set it to 0 to turn the cache off
+# The cache file lives next to this file by default, wherever the program is started from
+LLM_CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".llm_cache")
+)
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "86400"))
+_cache_lock = threading.Lock()
+
+# Semantic cache - near-identical requests reuse an earlier answer
+# Two requests count as the same if their embeddings' cosine similarity is above the threshold
+EMBEDDING_MODEL = "text-embedding-3-small"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+
+# Set USE_BETA=1 to use the older client.beta.chat.completions.parse API
+USE_BETA = os.getenv("USE_BETA", "").lower() in ("1", "true", "yes")
+
+# Skipped cache lookups are logged as warnings. Retries are logged at INFO level,
+# so they stay hidden unless logging is configured.
+logger = logging.getLogger(__name__)
+
+# Temporary API errors (rate limits, network problems, server errors) are retried
+# with exponential backoff before giving up
+_api_retry = retry(
+    stop=stop_after_attempt(5),
+    wait=wait_exponential_jitter(initial=1, max=30),
+    retry=retry_if_exception_type((
+        openai.RateLimitError,
+        openai.APIConnectionError,
+        openai.APITimeoutError,
+        openai.InternalServerError
+    )),
+    before_sleep=before_sleep_log(logger, logging.INFO),
+    reraise=True
+)
+
+class PoorAnswerError(Exception):
+    """
+    Raised when the AI's answer is valid but not usable, e.g. a batch with
+    the wrong number of results or an answer rejected by an accept check.
+    Such answers are never cached.
+    """
+
+
+def _check_answer(result: T, accept: Optional[Callable[[T], bool]]) -> T:
+    """Raises PoorAnswerError if accept(result) is False."""
+    if accept is not None and not accept(result):
+        raise PoorAnswerError("The AI's answer was rejected by the quality check")
+    return result
+
+
+# Guards client creation so concurrent callers don't each build their own client
+_client_lock = threading.Lock()
+
+
+def _check_api_key() -> None:
+    if not _API_KEY:
+        raise ValueError(
+            "OpenAI API key not found! Please set your OPENAI_API_KEY in the .env file.\n"
+            "You can get an API key from: https://platform.openai.com/api-keys\n\n"
+            "Create a .env file in your project directory with:\n"
+            "OPENAI_API_KEY=your-key-here"
+        )
+
+
+@lru_cache(maxsize=1)
+def _create_client() -> OpenAI:
+    _check_api_key()
+    # Retrying is done by _api_retry, so the SDK's own retries are turned off
+    return OpenAI(api_key=_API_KEY, http_client=_HTTP_CLIENT, max_retries=0)
+
+
+def _get_client() -> OpenAI:
+    """
+    Returns a shared OpenAI client, creating it on first use.
+
+    Reusing one client keeps its HTTPS connections alive between calls,
+    so only the first request pays for the TLS handshake.
+    Call _get_client.cache_clear() to force a fresh client (e.g. in tests).
+    """
+    with _client_lock:
+        return _create_client()
+
+
+_get_client.cache_clear = _create_client.cache_clear
+
+
+def _schema(response_model: Type[BaseModel]) -> dict:
+    """Returns the model's precomputed JSON schema (__cached_schema__) if it has one."""
+    return getattr(response_model, "__cached_schema__", None) or response_model.model_json_schema()
+
+
+def _json_schema_format(response_model: Type[BaseModel], strict: bool = True) -> dict:
+    """Builds the response_format parameter directly from the model's JSON schema."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": response_model.__name__,
+            "schema": _schema(response_model),
+            "strict": strict
+        }
+    }
+
+
+def _response_format(response_model: Type[BaseModel], strict: bool = False):
+    """
+    Picks the response_format for a request.
+    
+    Non-strict requests, and models with a precomputed schema, are sent as a
+    ready-made JSON schema. Otherwise the Pydantic model itself is passed and
+    the SDK builds the strict schema from it.
+    """
+    if strict and not hasattr(response_model, "__cached_schema__"):
+        return response_model
+    return _json_schema_format(response_model, strict)
+
+
+def _responses_request(params: dict) -> dict:
+    """Converts Chat Completions style params into a Responses API request."""
+    request = {"model": params["model"], "input": params["messages"]}
+    if "temperature" in params:
+        request["temperature"] = params["temperature"]
+    
+    response_format = params["response_format"]
+    if isinstance(response_format, dict):
+        # The Responses API takes the json_schema fields one level up
+        request["text"] = {"format": {"type": "json_schema", **response_format["json_schema"]}}
+    return request
+
+
+def _endpoint(params: dict, response_model: Type[T]) -> Tuple[str, dict, Callable[[object], T]]:
+    """
+    Works out how to send a request, the same way for the sync and async clients.
+    
+    params uses the Chat Completions layout (messages, response_format).
+    By default it is sent through the Responses API; set USE_BETA=1 to go
+    back to client.beta.chat.completions.parse.
+    
+    Returns:
+        (method, arguments, read): call the client method named by method
+        (e.g. "responses.create") with arguments, then pass the reply to
+        read to get an instance of response_model.
+    """
+    if USE_BETA:
+        if isinstance(params["response_format"], dict):
+            return (
+                "chat.completions.create",
+                params,
+                lambda completion: response_model.model_validate_json(
+                    completion.choices[0].message.content
+                )
+            )
+        return (
+            "beta.chat.completions.parse",
+            params,
+            lambda completion: completion.choices[0].message.parsed
+        )
+    
+    request = _responses_request(params)
+    if "text" in request:
+        return (
+            "responses.create",
+            request,
+            lambda response: response_model.model_validate_json(response.output_text)
+        )
+    return (
+        "responses.parse",
+        {"text_format": response_model, **request},
+        lambda response: response.output_parsed
+    )
+
+
+@_api_retry
+def _complete(client: OpenAI, params: dict, response_model: Type[T]) -> T:
+    """Calls the API and returns the response as an instance of response_model."""
+    method, arguments, read = _endpoint(params, response_model)
+    return read(attrgetter(method)(client)(**arguments))
+
+
+def _stream_deltas(client: OpenAI, params: dict) -> Iterator[str]:
+    """
+    Yields the response text piece by piece as the AI generates it.
+    
+    params must use a JSON schema dict as response_format.
+    """
+    if USE_BETA:
+        for chunk in client.chat.completions.create(stream=True, **params):
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+        return
+    
+    for event in client.responses.create(stream=True, **_responses_request(params)):
+        if event.type == "response.output_text.delta":
+            yield event.delta
+
+
+def _completed_items(partial_json: str, field: str) -> list:
+    """
+    Returns the items of the array `field` that have fully arrived in partial_json.
+    
+    Example: '{"champions": ["Ahri", "Ze' -> ["Ahri"]
+    """
+    match = re.search(rf'"{re.escape(field)}"\s*:\s*\[', partial_json)
+    if not match:
+        return []
+    
+    decoder = json.JSONDecoder()
+    items = []
+    pos = match.end()
+    while True:
+        # Skip the separators between items
+        while pos < len(partial_json) and partial_json[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(partial_json) or partial_json[pos] == "]":
+            return items
+        try:
+            item, pos = decoder.raw_decode(partial_json, pos)
+        except ValueError:
+            # The next item hasn't fully arrived yet
+            return items
+        items.append(item)
+
+
+@lru_cache(maxsize=32)
+def _schema_fingerprint(response_model: Type[BaseModel]) -> str:
+    """The model's schema as JSON text - built once per model, then reused for cache keys."""
+    return json.dumps(_schema(response_model), sort_keys=True)
+
+
+def _cache_key(model: str, prompt: str, response_model: Type[BaseModel]) -> str:
+    """Builds a stable key from everything that affects the AI's answer."""
+    schema = _schema_fingerprint(response_model)
+    raw = f"{model}|{prompt}|{response_model.__name__}|{schema}"
+    return hashlib.blake2b(raw.encode()).hexdigest()
+
+
+def _cache_get(key: str, response_model: Type[T]):
+    """Returns the cached response for key, or None if missing or expired."""
+    if LLM_CACHE_TTL <= 0:
+        return None
+    with _cache_lock, shelve.open(LLM_CACHE_PATH) as db:
+        entry = db.get(key)
+    if entry is None:
+        return None
+    stored_at, blob = entry
+    if time.time() - stored_at > LLM_CACHE_TTL:
+        return None
+    return response_model.model_validate_json(blob)
+
+
+def _cache_set(key: str, result: BaseModel) -> None:
+    """Stores a response on disk so the same request can skip the API next time."""
+    if LLM_CACHE_TTL <= 0:
+        return
+    with _cache_lock, shelve.open(LLM_CACHE_PATH) as db:
+        db[key] = (time.time(), result.model_dump_json())
+
+
+def _embed(text: str) -> List[float]:
+    """
+    Turns text into an embedding vector (OpenAI embeddings are unit length).
+    
+    Not retried: this is only a cache probe, so during an outage it should
+    fail fast and let the real request go ahead.
+    """
+    response = _get_client().embeddings.create(model=EMBEDDING_MODEL, input=text, timeout=10)
+    return response.data[0].embedding
+
+
+def cached_response(
+    model: str,
+    response_model: Type[T],
+    cache_key: str,
+    system_prompt: str = DEFAULT_SYSTEM_PROMPT
+) -> Optional[T]:
+    """
+    Returns the answer stored for a request made with cache_key and
+    system_prompt, or None.
+    
+    Only looks at the local cache - never calls the API.
+    """
+    messages = [{"role": "system", "content": system_prompt}]
+    return _lookup(messages, model, response_model, cache_key)[1]
+
+
+def _semantic_key(response_model: Type[BaseModel], partition: str) -> str:
+    return f"semantic:{response_model.__name__}:{partition}"
+
+
+def semantic_cache_get(
+    query: str,
+    response_model: Type[T],
+    partition: str = ""
+) -> Tuple[Optional[T], Optional[List[float]]]:
+    """
+    Looks for an earlier answer to a request that means the same as query.
+
+    Keep query short and limited to the parts that change between requests
+    (e.g. just the team composition) - long shared boilerplate makes every
+    request look similar. Anything that must match exactly (e.g. the role
+    being asked about) belongs in partition: only entries stored with the
+    same partition are compared.
+
+    If the embedding request fails, the error is logged and treated as a miss.
+
+    Returns:
+        (result, embedding): result is None on a miss. Pass the embedding to
+        semantic_cache_set so the query doesn't have to be embedded twice.
+        embedding is None if the query couldn't be embedded.
+    """
+    try:
+        embedding = _embed(query)
+    except Exception as e:
+        logger.warning("Semantic cache skipped, embedding failed: %s", e)
+        return None, None
+    
+    if LLM_CACHE_TTL <= 0:
+        return None, embedding
+
+    with _cache_lock, shelve.open(LLM_CACHE_PATH) as db:
+        entries = db.get(_semantic_key(response_model, partition), [])
+
+    best_score, best_blob = 0.0, None
+    now = time.time()
+    for stored_at, stored_embedding, blob in entries:
+        if now - stored_at > LLM_CACHE_TTL:
+            continue
+        # Dot product equals cosine similarity because the vectors are unit length
+        score = sum(a * b for a, b in zip(embedding, stored_embedding))
+        if score > best_score:
+            best_score, best_blob = score, blob
+
+    if best_blob is not None and best_score > SEMANTIC_CACHE_THRESHOLD:
+        return response_model.model_validate_json(best_blob), embedding
+    return None, embedding
+
+
+def semantic_cache_set(
+    embedding: Optional[List[float]],
+    result: BaseModel,
+    partition: str = ""
+) -> None:
+    """Remembers result so similar requests in the same partition can reuse it."""
+    if LLM_CACHE_TTL <= 0 or embedding is None:
+        return
+    key = _semantic_key(type(result), partition)
+    now = time.time()
+    with _cache_lock, shelve.open(LLM_CACHE_PATH) as db:
+        # Drop expired entries while we're here so the file doesn't grow forever
+        entries = [e for e in db.get(key, []) if now - e[0] <= LLM_CACHE_TTL]
+        entries.append((now, embedding, result.model_dump_json()))
+        db[key] = entries
+
+
+@lru_cache(maxsize=1)
+def _create_async_client(loop: asyncio.AbstractEventLoop) -> AsyncOpenAI:
+    # Check the key first so a missing key doesn't leave an unused connection pool behind
+    _check_api_key()
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_KEEPALIVE
+        ),
+        timeout=httpx.Timeout(120.0)
+    )
+    return AsyncOpenAI(api_key=_API_KEY, http_client=http_client, max_retries=0)
+
+
+def _get_async_client() -> AsyncOpenAI:
+    """
+    Returns the AsyncOpenAI client (with its own pooled httpx.AsyncClient)
+    for the running event loop.
+
+    Async connections belong to the event loop that opened them and can't be
+    used after it closes, so each loop gets its own client: requests within
+    one asyncio.run() share connections, and the next asyncio.run() starts
+    with a fresh client instead of failing with "Event loop is closed".
+    """
+    return _create_async_client(asyncio.get_running_loop())
+
+
+def _build_params(model: str, messages: List[dict], response_format) -> dict:
+    """Builds the request parameters (in Chat Completions layout)."""
+    params = {
+        "model": model,
+        "messages": messages,
+        "response_format": response_format
+    }
+    
+    # Only add temperature for models that support it (GPT-5 doesn't)
+    if not model.startswith("gpt-5"):
+        params["temperature"] = 0.7  # Controls randomness (0.0 = deterministic, 1.0 = creative)
+    
+    return params
+
+
+def _lookup(
+    messages: List[dict],
+    model: str,
+    response_model: Type[T],
+    cache_key: Optional[str] = None
+) -> Tuple[str, Optional[T]]:
+    """
+    Returns (key, cached answer or None) for a request.
+    
+    cache_key replaces the user prompt in the cache key when given. The
+    system prompt is always part of the key, so editing it invalidates
+    earlier answers.
+    """
+    if cache_key is None:
+        key_text = "|".join(message["content"] for message in messages)
+    else:
+        system = [message["content"] for message in messages if message["role"] == "system"]
+        key_text = "|".join(system + [cache_key])
+    key = _cache_key(model, key_text, response_model)
+    return key, _cache_get(key, response_model)
+
+
+def _finish(key: str, result: T, accept: Optional[Callable[[T], bool]]) -> T:
+    """Checks the answer with accept, stores it in the cache and returns it."""
+    result = _check_answer(result, accept)
+    _cache_set(key, result)
+    return result
+
+
+def _prepare(
+    messages: List[dict],
+    model: str,
+    response_model: Type[T],
+    response_format,
+    cache_key: Optional[str] = None
+) -> Tuple[str, Optional[T], dict]:
+    """
+    First half of every request, shared by the sync, streaming and async paths.
+    
+    Returns:
+        (key, cached, params): the cache key to pass to _finish, the cached
+        answer (or None), and the request parameters.
+    """
+    key, cached = _lookup(messages, model, response_model, cache_key)
+    return key, cached, _build_params(model, messages, response_format)
+
+
+@contextmanager
+def _reporting_errors(model: str):
+    """
+    Prints troubleshooting tips for API problems raised inside the block.
+    
+    Unusable answers (ValidationError, PoorAnswerError) are not API problems,
+    so they are left for the caller to handle (e.g. try a bigger model).
+    """
+    try:
+        yield
+    except (ValidationError, PoorAnswerError):
+        raise
+    except Exception as e:
+        print(f"❌ Error calling OpenAI API: {e}")
+        print("\nTroubleshooting tips:")
+        print("1. Check that your API key is valid in the .env file")
+        print("2. Verify you have API credits available")
+        print("3. Ensure the model name is correct")
+        print(f"4. Model requested: {model}")
+        raise
+
+
+def _call(
+    messages: List[dict],
+    model: str,
+    response_model: Type[T],
+    cache_key: Optional[str] = None,
+    strict: bool = False,
+    accept: Optional[Callable[[T], bool]] = None
+) -> T:
+    """
+    Shared core of the structured generators: response cache, shared client,
+    request parameters, retries and parsing all happen here.
+    
+    cache_key replaces the user prompt in the cache key when given (see _lookup).
+    Answers for which accept(result) is False raise PoorAnswerError and are not cached.
+    """
+    
+    # Identical requests are answered from the local cache (no API call)
+    # The response is requested in your Pydantic model's JSON schema
+    # format (see _endpoint for which endpoint is used)
+    key, cached, params = _prepare(
+        messages, model, response_model, _response_format(response_model, strict), cache_key
+    )
+    if cached is not None:
+        return cached
+    
+    # Reuse the shared OpenAI client (keeps connections alive between calls)
+    # Raises ValueError if OPENAI_API_KEY is not set
+    client = _get_client()
+    
+    with _reporting_errors(model):
+        # Get the parsed response (retried on temporary errors)
+        # The response is validated against your Pydantic model
+        return _finish(key, _complete(client, params, response_model), accept)
+
+
+def structured_generator(
+    model: str,
+    prompt: str,
+    response_model: Type[T],
+    cache_key: Optional[str] = None,
+    strict: bool = False,
+    accept: Optional[Callable[[T], bool]] = None
+) -> T:
     """
     Generates structured output from OpenAI's API using Pydantic models.
     
@@ -25,6 +572,13 @@ def structured_generator(model: str, prompt: str, response_model: Type[T]) -> T:
         model (str): The OpenAI model to use (e.g., "gpt-4-turbo", "gpt-4", "gpt-3.5-turbo")
         prompt (str): The prompt/instruction for the AI
         response_model (Type[T]): A Pydantic BaseModel class that defines the expected output structure
+        cache_key (str, optional): Identifies the request in the response cache instead
+            of the prompt text. Useful when differently worded prompts mean the same thing.
+            The system prompt is still part of the cache key.
+        strict (bool): Use OpenAI's strict structured outputs. Strict mode guarantees the
+            schema is followed but adds latency; non-strict output is still validated by Pydantic.
+        accept (callable, optional): Quality check for the answer. If accept(result) is
+            False, PoorAnswerError is raised and the answer is not cached.
     
     Returns:
         T: An instance of the response_model filled with AI-generated data
@@ -41,68 +595,23 @@ def structured_generator(model: str, prompt: str, response_model: Type[T]) -> T:
         result = structured_generator("gpt-4", "Generate a person", MyModel)
         print(result.name)  # AI-generated name
     """
-    
-    # Get API key from environment variable
-    api_key = os.getenv("OPENAI_API_KEY")
-    
-    if not api_key:
-        raise ValueError(
-            "OpenAI API key not found! Please set your OPENAI_API_KEY in the .env file.\n"
-            "You can get an API key from: https://platform.openai.com/api-keys\n\n"
-            "Create a .env file in your project directory with:\n"
-            "OPENAI_API_KEY=your-key-here"
-        )
-    
-    # Initialize OpenAI client
-    client = OpenAI(api_key=api_key)
-    
-    try:
-        # Call OpenAI API with structured output parsing
-        # This uses the beta.chat.completions.parse endpoint which enforces
-        # that the response matches your Pydantic model structure
-        
-        # Build base parameters
-        params = {
-            "model": model,
-            "messages": [
-                {
-                    "role": "system",
-                    "content": "You are a helpful AI assistant that provides structured, accurate responses."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "response_format": response_model
-        }
-        
-        # Only add temperature for models that support it (GPT-5 doesn't)
-        if not model.startswith("gpt-5"):
-            params["temperature"] = 0.7  # Controls randomness (0.0 = deterministic, 1.0 = creative)
-        
-        completion = client.beta.chat.completions.parse(**params)
-        
-        # Extract and return the parsed response
-        # The API automatically validates it matches your Pydantic model
-        return completion.choices[0].message.parsed
-        
-    except Exception as e:
-        # Provide helpful error messages
-        print(f"❌ Error calling OpenAI API: {e}")
-        print("\nTroubleshooting tips:")
-        print("1. Check that your API key is valid in the .env file")
-        print("2. Verify you have API credits available")
-        print("3. Ensure the model name is correct")
-        print(f"4. Model requested: {model}")
-        raise
+    messages = [
+        {"role": "system", "content": DEFAULT_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+    return _call(
+        messages, model, response_model, cache_key=cache_key, strict=strict, accept=accept
+    )
 
 
 def structured_generator_with_system_prompt(
     model: str,
     system_prompt: str,
     user_prompt: str,
-    response_model: Type[T]
+    response_model: Type[T],
+    cache_key: Optional[str] = None,
+    strict: bool = False,
+    accept: Optional[Callable[[T], bool]] = None
 ) -> T:
     """
     Same as structured_generator but allows custom system prompt.
@@ -114,40 +623,276 @@ def structured_generator_with_system_prompt(
         system_prompt (str): Instructions about how the AI should behave
         user_prompt (str): The actual user request/prompt
         response_model (Type[T]): Pydantic model for output structure
+        cache_key (str, optional): Identifies the request in the response cache
+            instead of user_prompt (system_prompt is still part of the key)
+        strict (bool): Use OpenAI's strict structured outputs (slower, guaranteed schema)
+        accept (callable, optional): Quality check for the answer. If accept(result) is
+            False, PoorAnswerError is raised and the answer is not cached.
     
     Returns:
         T: Structured response matching the model
     """
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+    return _call(
+        messages, model, response_model, cache_key=cache_key, strict=strict, accept=accept
+    )
+
+
+@lru_cache(maxsize=32)
+def _batch_model(response_model: Type[BaseModel]) -> Type[BaseModel]:
+    """
+    Wraps the response model in a list so one response holds every answer.
+    Built once per model, so its schema (and cache key part) is reused too.
+    """
+    return create_model(
+        f"{response_model.__name__}Batch",
+        __config__=ConfigDict(extra="forbid"),
+        results=(List[response_model], Field(description="One result per request, in order"))
+    )
+
+
+def cached_batch_response(
+    model: str,
+    response_model: Type[T],
+    cache_key: str,
+    system_prompt: str = DEFAULT_SYSTEM_PROMPT
+) -> Optional[List[T]]:
+    """
+    Returns the results stored for a structured_generator_batch request made
+    with cache_key and system_prompt, or None.
     
-    api_key = os.getenv("OPENAI_API_KEY")
+    Only looks at the local cache - never calls the API.
+    """
+    batch = cached_response(model, _batch_model(response_model), cache_key, system_prompt)
+    return None if batch is None else batch.results
+
+
+def structured_generator_batch(
+    model: str,
+    prompts: List[str],
+    response_model: Type[T],
+    system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+    cache_key: Optional[str] = None,
+    strict: bool = False,
+    accept: Optional[Callable[[List[T]], bool]] = None
+) -> List[T]:
+    """
+    Answers several prompts with a single API request.
+    
+    The prompts are numbered and sent together, and the AI returns one
+    response_model per prompt. This uses one request from your rate limit
+    instead of len(prompts), and the system prompt is only sent once.
+    
+    A batch with the wrong number of results, or whose results fail
+    accept(results), raises PoorAnswerError and is not cached.
+    
+    Returns:
+        List[T]: One result per prompt, in the same order as prompts
+    """
+    
+    batch_model = _batch_model(response_model)
+    
+    numbered = "\n\n".join(
+        f"REQUEST {i}:\n{prompt}" for i, prompt in enumerate(prompts, 1)
+    )
+    user_prompt = (
+        f"Answer each of the following {len(prompts)} requests separately. "
+        f"Return exactly one result per request, in the same order.\n\n{numbered}"
+    )
+    
+    def check(batch) -> bool:
+        if len(batch.results) != len(prompts):
+            raise PoorAnswerError(f"Expected {len(prompts)} results, got {len(batch.results)}")
+        return accept is None or accept(batch.results)
+    
+    batch = structured_generator_with_system_prompt(
+        model,
+        system_prompt,
+        user_prompt,
+        batch_model,
+        cache_key=cache_key,
+        strict=strict,
+        accept=check
+    )
+    return batch.results
+
+
+def structured_generator_stream(
+    model: str,
+    prompt: str,
+    response_model: Type[T],
+    stream_field: str,
+    on_item: Callable[[int, object], None],
+    system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+    cache_key: Optional[str] = None,
+    strict: bool = False,
+    on_restart: Optional[Callable[[], None]] = None,
+    accept: Optional[Callable[[T], bool]] = None
+) -> T:
+    """
+    Like structured_generator, but streams the response so results can be
+    shown while the AI is still writing.
+    
+    Every time an item of the list field `stream_field` is complete,
+    on_item(number, item) is called (number starts at 1). The full,
+    validated response is returned at the end.
+    
+    If the stream fails after some items were shown and is retried, the AI
+    writes a new answer: on_restart() is called so earlier items can be
+    discarded, and numbering starts again from 1.
     
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY not found in .env file!")
+    If accept(result) is False, PoorAnswerError is raised and the answer is not cached.
+    
+    Example:
+        result = structured_generator_stream(
+            "gpt-4", prompt, ChampionRecommendations, "champions",
+            on_item=lambda i, champ: print(f"{i}. {champ}", flush=True)
+        )
+    """
+    
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": prompt}
+    ]
+    # Streaming always sends the JSON schema directly
+    key, cached, params = _prepare(
+        messages, model, response_model, _json_schema_format(response_model, strict), cache_key
+    )
+    if cached is not None:
+        # Nothing to stream - hand over the cached items right away
+        for number, item in enumerate(getattr(cached, stream_field), 1):
+            on_item(number, item)
+        return cached
+    
+    client = _get_client()
+    shown = 0
+    
+    @_api_retry
+    def stream_text() -> str:
+        # A retry is a brand new answer, so items from a failed attempt don't count
+        nonlocal shown
+        if shown and on_restart is not None:
+            on_restart()
+        shown = 0
+        text = ""
+        for delta in _stream_deltas(client, params):
+            text += delta
+            items = _completed_items(text, stream_field)
+            for item in items[shown:]:
+                shown += 1
+                on_item(shown, item)
+        return text
+    
+    with _reporting_errors(model):
+        return _finish(key, response_model.model_validate_json(stream_text()), accept)
+
+
+@_api_retry
+async def _acomplete(client: AsyncOpenAI, params: dict, response_model: Type[T]) -> T:
+    """Async version of _complete - same endpoints, see _endpoint."""
+    method, arguments, read = _endpoint(params, response_model)
+    return read(await attrgetter(method)(client)(**arguments))
+
+
+async def astructured_generator(
+    model: str,
+    prompt: str,
+    response_model: Type[T],
+    cache_key: Optional[str] = None,
+    strict: bool = False,
+    accept: Optional[Callable[[T], bool]] = None
+) -> T:
+    """
+    Async version of structured_generator.
+
+    Lets you run several requests at the same time with asyncio.gather
+    instead of waiting for each one to finish.
+
+    Args:
+        model (str): The OpenAI model to use
+        prompt (str): The prompt/instruction for the AI
+        response_model (Type[T]): Pydantic model for output structure
+        cache_key, strict, accept: Same as in structured_generator
+
+    Returns:
+        T: Structured response matching the model
+    """
+
+    messages = [
+        {"role": "system", "content": DEFAULT_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+    key, cached, params = _prepare(
+        messages, model, response_model, _response_format(response_model, strict), cache_key
+    )
+    if cached is not None:
+        return cached
+
+    client = _get_async_client()
+
+    with _reporting_errors(model):
+        return _finish(key, await _acomplete(client, params, response_model), accept)
+
+
+async def batch_structured(prompts: List[str], model: str, response_model: Type[T]) -> List[T]:
+    """
+    Sends all prompts concurrently and returns the results in the same order.
+
+    Example:
+        results = asyncio.run(batch_structured(prompts, "gpt-4", MyModel))
+    """
+    return await asyncio.gather(
+        *(astructured_generator(model, prompt, response_model) for prompt in prompts)
+    )
+
+
+def warm_schema(model: str, response_model: Type[BaseModel], strict: bool = False) -> None:
+    """
+    Sends a throwaway, tiny request using response_model's schema.
     
-    client = OpenAI(api_key=api_key)
+    In strict mode OpenAI compiles each new schema the first time it sees it,
+    which makes that first request slower. Running this at startup (e.g. in a
+    background thread) moves that cost out of the way of the real request.
+    Non-strict requests have nothing to compile, so this does nothing for them.
+    Errors are ignored - this is only an optimization.
+    """
+    if not strict:
+        return
     
     try:
-        # Build base parameters
+        client = _get_client()
         params = {
             "model": model,
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            "response_format": response_model
+            "messages": [{"role": "user", "content": "ping"}],
+            "response_format": _json_schema_format(response_model)
         }
         
-        # Only add temperature for models that support it (GPT-5 doesn't)
-        if not model.startswith("gpt-5"):
-            params["temperature"] = 0.7
-        
-        completion = client.beta.chat.completions.parse(**params)
-        
-        return completion.choices[0].message.parsed
-        
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        raise
+        # Warm the same endpoint the real requests use
+        if USE_BETA:
+            client.chat.completions.create(max_completion_tokens=1, **params)
+        else:
+            # 16 is the smallest output limit the Responses API accepts
+            client.responses.create(max_output_tokens=16, **_responses_request(params))
+    except Exception:
+        pass
+
+
+def warm_connection() -> None:
+    """
+    Opens the HTTPS connection to the OpenAI API ahead of time.
+    
+    The first request normally pays for the TCP and TLS handshakes. This sends
+    a cheap HEAD request through the shared connection pool so the connection
+    is already open and kept alive when the real request is made.
+    Errors are ignored - this is only an optimization.
+    """
+    try:
+        _HTTP_CLIENT.head(_get_client().base_url.join("models"), timeout=5)
+    except Exception:
+        pass
 
 
 # Optional: Function to test if API key is working
@@ -159,12 +904,11 @@ def test_api_connection() -> bool:
         bool: True if connection successful, False otherwise
     """
     try:
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
+        if not _API_KEY:
             print("❌ No API key found in .env file")
             return False
         
-        client = OpenAI(api_key=api_key)
+        client = _get_client()
         
         # Make a minimal API call to test connection
         response = client.chat.completions.create(